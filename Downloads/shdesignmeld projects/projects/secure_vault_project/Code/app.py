@@ -1,13 +1,20 @@
-from flask import Flask, render_template, request, redirect, url_for, session, send_from_directory, send_file, Response
+from flask import Flask, render_template, request, redirect, url_for, session, Response
 import os
 import shutil
 import hashlib
+import hmac
+import itertools
 import secrets
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List
-import zipfile
+from typing import TYPE_CHECKING, Dict, List
 import io
+from array import array
+
+if TYPE_CHECKING:
+    import zipfile
 
 RUNTIME_BASE_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
 app = Flask(
@@ -16,6 +23,7 @@ app = Flask(
     static_folder=str(RUNTIME_BASE_DIR / "static"),
 )
 app.secret_key = secrets.token_hex(32)
+app.jinja_env.globals['zip'] = zip  # dashboard iterates column-wise file listings
 
 # ============================================================
 # CONFIGURATION
@@ -34,107 +42,196 @@ for category, extensions in FILE_EXTENSION_MAP.items():
     for ext in extensions:
         EXTENSION_TO_CATEGORY[ext.lower()] = category
 
+# Lowercase and uppercase spellings resolve without calling str.lower()
+_EXT_CATEGORY = dict(EXTENSION_TO_CATEGORY)
+_EXT_CATEGORY.update({ext.upper(): category for ext, category in EXTENSION_TO_CATEGORY.items()})
+_EXT_CATEGORY_GET = _EXT_CATEGORY.get
+
+# Already-compressed formats are stored as-is in ZIP downloads
+STORED_EXTENSIONS = frozenset().union(
+    *(FILE_EXTENSION_MAP[k] for k in ('Images', 'Videos', 'Audio', 'Archives'))
+) - {'.bmp', '.svg', '.tiff', '.tif', '.raw', '.psd', '.ico', '.wav', '.aiff', '.tar', '.iso'}
+
+# Directories and file extensions left out of the project ZIP
+_SKIP_DIRS = frozenset({'__pycache__', '.git', '.vscode', 'protected_files', '.pytest_cache', 'instance'})
+_SKIP_EXTS = frozenset({'.pyc', '.pyo', '.db', '.log', '.exe'})
+
+# Subfolders of the watch directory listed on the dashboard
+SCANNED_DIRS = frozenset(FILE_EXTENSION_MAP) | {'Others'}
+
 # Default watch directory (Downloads folder)
 DEFAULT_WATCH_DIR = os.path.join(os.path.expanduser('~'), 'Downloads')
 
 # Default password (change this!)
 DEFAULT_PASSWORD = "Irfan@786"
+DEFAULT_PASSWORD_HASH = hashlib.sha256(DEFAULT_PASSWORD.encode()).digest()
 
 # Protected files directory
 PROTECTED_DIR = "protected_files"
 
+# Dashboard structure for the most recently listed watch dir, reused while
+# folder mtimes are unchanged; listing another folder replaces the entry
+_STRUCTURE_CACHE: Dict[str, tuple] = {}
+_STRUCTURE_CACHE_LOCK = threading.Lock()
+
 
 # ============================================================
 # HELPER FUNCTIONS
 # ============================================================
 
-def hash_password(password: str) -> str:
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-
 def get_category_for_file(filename: str) -> str:
     """Determine category for a file"""
-    ext = Path(filename).suffix.lower()
-    return EXTENSION_TO_CATEGORY.get(ext, 'Others')
+    idx = filename.rfind('.')
+    if idx <= 0:
+        return 'Others'
+    ext = filename[idx:]
+    category = _EXT_CATEGORY_GET(ext)
+    if category is None:
+        category = _EXT_CATEGORY_GET(ext.lower(), 'Others')
+    return category
+
+
+def categorize_files(filenames: List[str]) -> List[str]:
+    """Determine categories for a batch of files in one pass"""
+    classify = get_category_for_file
+    return [classify(filename) for filename in filenames]
 
 
 def generate_unique_filename(destination_dir: str, filename: str) -> str:
     """Generate unique filename if conflict exists"""
-    file_path = Path(destination_dir) / filename
-    if not file_path.exists():
+    file_path = os.path.join(destination_dir, filename)
+    if not os.path.exists(file_path):
         return filename
     
-    path_obj = Path(filename)
-    name = path_obj.stem
-    extension = path_obj.suffix
+    name, extension = os.path.splitext(filename)
     
     counter = 1
     while True:
         new_filename = f"{name}({counter}){extension}"
-        new_path = Path(destination_dir) / new_filename
-        if not new_path.exists():
+        new_path = os.path.join(destination_dir, new_filename)
+        if not os.path.exists(new_path):
             return new_filename
         counter += 1
 
 
-def get_directory_structure(watch_dir: str) -> Dict:
-    """Get directory structure with file information"""
+def move_file(src: str, dst: str) -> None:
+    """Move a file, using a plain rename when both paths are on one filesystem"""
+    try:
+        os.rename(src, dst)
+    except OSError:
+        shutil.move(src, dst)
+
+
+def _scan_files(dir_path: str) -> List[Dict]:
+    """List regular files in a directory using cached scandir stat info"""
+    with os.scandir(dir_path) as it:
+        return [
+            {
+                'name': e.name,
+                'size': e.stat().st_size,
+                'path': e.path
+            }
+            for e in it if e.is_file(follow_symlinks=False)
+        ]
+
+
+def _empty_columns() -> Dict:
+    """Column-oriented file listing: parallel names, sizes and paths"""
+    return {'names': [], 'sizes': array('q'), 'paths': []}
+
+
+def _scan_columns(dir_path: str) -> Dict:
+    """List regular files in a directory as parallel columns"""
+    columns = _empty_columns()
+    names, sizes, paths = columns['names'], columns['sizes'], columns['paths']
+    with os.scandir(dir_path) as it:
+        for e in it:
+            if e.is_file(follow_symlinks=False):
+                names.append(e.name)
+                sizes.append(e.stat().st_size)
+                paths.append(e.path)
+    return columns
+
+
+def _build_directory_structure(watch_dir: str) -> Dict:
+    """Get directory structure with file information, stored column-wise per folder"""
     structure = {
         'root': watch_dir,
         'categories': {},
-        'others': [],
+        'others': _empty_columns(),
         'total_files': 0
     }
     
-    # Initialize category folders
+    # Single pass over the root: collect unorganized files and category folders
+    root_files = _empty_columns()
+    root_files['categories'] = []
+    category_dirs = {}
+    with os.scandir(watch_dir) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                root_files['names'].append(entry.name)
+                root_files['sizes'].append(entry.stat().st_size)
+                root_files['paths'].append(entry.path)
+                root_files['categories'].append(get_category_for_file(entry.name))
+            elif entry.name in SCANNED_DIRS and entry.is_dir():
+                category_dirs[entry.name] = entry.path
+    
+    # Category folders
     for category in FILE_EXTENSION_MAP.keys():
-        category_path = os.path.join(watch_dir, category)
-        if os.path.exists(category_path):
-            files = []
-            for f in os.listdir(category_path):
-                filepath = os.path.join(category_path, f)
-                if os.path.isfile(filepath):
-                    files.append({
-                        'name': f,
-                        'size': os.path.getsize(filepath),
-                        'path': filepath,
-                        'category': category
-                    })
+        if category in category_dirs:
+            files = _scan_columns(category_dirs[category])
             structure['categories'][category] = files
-            structure['total_files'] += len(files)
+            structure['total_files'] += len(files['names'])
     
     # Others folder
-    others_path = os.path.join(watch_dir, 'Others')
-    if os.path.exists(others_path):
-        for f in os.listdir(others_path):
-            filepath = os.path.join(others_path, f)
-            if os.path.isfile(filepath):
-                structure['others'].append({
-                    'name': f,
-                    'size': os.path.getsize(filepath),
-                    'path': filepath,
-                    'category': 'Others'
-                })
-        structure['total_files'] += len(structure['others'])
+    if 'Others' in category_dirs:
+        structure['others'] = _scan_columns(category_dirs['Others'])
+        structure['total_files'] += len(structure['others']['names'])
     
     # Root level files (unorganized)
-    root_files = []
-    for f in os.listdir(watch_dir):
-        filepath = os.path.join(watch_dir, f)
-        if os.path.isfile(filepath):
-            root_files.append({
-                'name': f,
-                'size': os.path.getsize(filepath),
-                'path': filepath,
-                'category': get_category_for_file(f)
-            })
     structure['root_files'] = root_files
-    structure['total_files'] += len(root_files)
+    structure['total_files'] += len(root_files['names'])
+    
+    # Per-folder byte totals, summed directly over the size arrays
+    size_by_category = {category: sum(files['sizes']) for category, files in structure['categories'].items()}
+    size_by_category['Others'] = sum(structure['others']['sizes'])
+    structure['size_by_category'] = size_by_category
     
     return structure
 
 
+def _structure_cache_key(watch_dir: str) -> tuple:
+    """mtimes of the watch dir and its listed subfolders; any add/remove changes one"""
+    key = [os.stat(watch_dir).st_mtime_ns]
+    for name in (*FILE_EXTENSION_MAP, 'Others'):
+        try:
+            key.append(os.stat(os.path.join(watch_dir, name)).st_mtime_ns)
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+
+def get_directory_structure(watch_dir: str) -> Dict:
+    """Get directory structure, rebuilding it only when a listed folder changed"""
+    key = _structure_cache_key(watch_dir)
+    with _STRUCTURE_CACHE_LOCK:
+        cached = _STRUCTURE_CACHE.get(watch_dir)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    
+    structure = _build_directory_structure(watch_dir)
+    with _STRUCTURE_CACHE_LOCK:
+        _STRUCTURE_CACHE.clear()
+        _STRUCTURE_CACHE[watch_dir] = (key, structure)
+    return structure
+
+
+def invalidate_directory_structure(watch_dir: str) -> None:
+    """Drop the cached dashboard structure for a watch dir"""
+    with _STRUCTURE_CACHE_LOCK:
+        _STRUCTURE_CACHE.pop(watch_dir, None)
+
+
 def organize_all_files(watch_dir: str) -> Dict:
     """Organize all files in directory"""
     results = {'organized': 0, 'errors': 0, 'skipped': 0}
@@ -149,32 +246,74 @@ def organize_all_files(watch_dir: str) -> Dict:
     if not os.path.exists(others_path):
         os.makedirs(others_path)
     
-    # Process each file in root
-    for f in os.listdir(watch_dir):
-        filepath = os.path.join(watch_dir, f)
+    # Names already present in each destination folder, listed once per run
+    # (casefolded, since Windows and macOS filesystems ignore case by default;
+    # on case-sensitive filesystems this at worst adds an unneeded suffix)
+    existing: Dict[str, set] = {}
+    
+    def unique_filename_for(destination_dir: str, filename: str) -> str:
+        names = existing.get(destination_dir)
+        if names is None:
+            with os.scandir(destination_dir) as it:
+                names = existing[destination_dir] = {e.name.casefold() for e in it}
+        
+        candidate = filename
+        if candidate.casefold() in names:
+            name, extension = os.path.splitext(filename)
+            counter = 1
+            while True:
+                candidate = f"{name}({counter}){extension}"
+                if candidate.casefold() not in names:
+                    break
+                counter += 1
         
+        names.add(candidate.casefold())
+        return candidate
+    
+    # Process each file in root
+    with os.scandir(watch_dir) as it:
+        entries = list(it)
+    
+    # Collect the files to organize
+    pending = []
+    for entry in entries:
         # Skip directories and hidden files
-        if os.path.isdir(filepath) or f.startswith('.'):
+        if entry.is_dir() or entry.name.startswith('.'):
             results['skipped'] += 1
             continue
         
         # Skip if it's the protected folder
-        if f == PROTECTED_DIR:
+        if entry.name == PROTECTED_DIR:
             results['skipped'] += 1
             continue
         
-        category = get_category_for_file(f)
+        pending.append(entry)
+    
+    # Plan every move first so the renames run as one batch
+    moves = []
+    categories = categorize_files([entry.name for entry in pending])
+    for entry, category in zip(pending, categories):
+        f = entry.name
         
         if category == 'Others':
             destination_dir = others_path
         else:
             destination_dir = os.path.join(watch_dir, category)
         
-        unique_filename = generate_unique_filename(destination_dir, f)
-        destination_path = os.path.join(destination_dir, unique_filename)
-        
+        # A destination that can't be listed (not a folder, no permission)
+        # only fails the files headed there
         try:
-            shutil.move(filepath, destination_path)
+            unique_filename = unique_filename_for(destination_dir, f)
+        except OSError as e:
+            print(f"Error moving {f}: {e}")
+            results['errors'] += 1
+            continue
+        moves.append((f, entry.path, os.path.join(destination_dir, unique_filename)))
+    
+    # Perform all planned moves back to back
+    for f, filepath, destination_path in moves:
+        try:
+            move_file(filepath, destination_path)
             results['organized'] += 1
         except Exception as e:
             print(f"Error moving {f}: {e}")
@@ -183,6 +322,123 @@ def organize_all_files(watch_dir: str) -> Dict:
     return results
 
 
+class ZipStreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands out ZIP bytes as they are written"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _scan_project_files(directory: str, base_dir: str):
+    """Yield (path, arcname) for project files using a recursive scandir walk"""
+    with os.scandir(directory) as it:
+        entries = list(it)
+    
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            # Skip certain directories
+            if entry.name in _SKIP_DIRS:
+                continue
+            yield from _scan_project_files(entry.path, base_dir)
+        elif entry.is_file():
+            # Skip certain files
+            if os.path.splitext(entry.name)[1] in _SKIP_EXTS:
+                continue
+            yield entry.path, os.path.relpath(entry.path, base_dir)
+
+
+def iter_project_files(project_root: str, base_dir: str):
+    """Yield (arcname, open binary file) for every file to include in the project ZIP"""
+    if not hasattr(os, 'fwalk'):
+        # Windows has no fwalk; open each file by its full path
+        for file_path, arcname in _scan_project_files(project_root, base_dir):
+            try:
+                src = open(file_path, 'rb')
+            except OSError as e:
+                print(f"Error adding {arcname} to ZIP: {e}")
+                continue
+            yield arcname, src
+        return
+    
+    # Open entries relative to the directory fd so the kernel never re-resolves full paths
+    splitext = os.path.splitext
+    for root, dirs, files, dir_fd in os.fwalk(project_root):
+        # Skip certain directories
+        dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
+        
+        for file in files:
+            # Skip certain files
+            if splitext(file)[1] in _SKIP_EXTS:
+                continue
+            
+            arcname = os.path.relpath(os.path.join(root, file), base_dir)
+            try:
+                fd = os.open(file, os.O_RDONLY, dir_fd=dir_fd)
+            except OSError as e:
+                print(f"Error adding {arcname} to ZIP: {e}")
+                continue
+            yield arcname, os.fdopen(fd, 'rb')
+
+
+def _zip_info_from_stat(arcname: str, st: os.stat_result) -> 'zipfile.ZipInfo':
+    """Build a ZipInfo from an already-fetched stat result"""
+    import zipfile
+    
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    zip_info = zipfile.ZipInfo(arcname, date_time)
+    zip_info.external_attr = (st.st_mode & 0xFFFF) << 16
+    zip_info.file_size = st.st_size
+    return zip_info
+
+
+def generate_zip(files, chunk_size: int = 64 * 1024):
+    """Build a ZIP archive incrementally, yielding bytes as they are produced"""
+    # Only needed for downloads, so keep it out of app startup
+    import zipfile
+    
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for arcname, src in files:
+            with src:
+                zip_info = _zip_info_from_stat(arcname, os.fstat(src.fileno()))
+                if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+                    zip_info.compress_type = zipfile.ZIP_STORED
+                else:
+                    zip_info.compress_type = zipfile.ZIP_DEFLATED
+                    zip_info._compresslevel = 1  # same attribute ZipFile.write sets
+                with zip_file.open(zip_info, 'w') as dest:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            
+            data = buffer.drain()
+            if data:
+                yield data
+    
+    # Central directory is written when the archive closes
+    yield buffer.drain()
+
+
 # ============================================================
 # ROUTES
 # ============================================================
@@ -200,9 +456,10 @@ def login():
     
     if request.method == 'POST':
         password = request.form.get('password', '')
-        if hash_password(password) == hash_password(DEFAULT_PASSWORD):
+        password_hash = hashlib.sha256(password.encode()).digest()
+        if hmac.compare_digest(password_hash, DEFAULT_PASSWORD_HASH):
             session['authenticated'] = True
-            session['password'] = hash_password(password)  # Store hashed password
+            session['password'] = password_hash.hex()  # Store hashed password
             return redirect(url_for('dashboard'))
         else:
             error = 'Invalid password! Try again.'
@@ -240,7 +497,7 @@ def dashboard():
         except:
             watch_dir = os.path.expanduser('~')
     
-    structure = get_directory_structure(watch_dir)
+    structure = dict(get_directory_structure(watch_dir))
     structure['watch_dir'] = watch_dir
     
     return render_template('dashboard.html', structure=structure)
@@ -254,6 +511,7 @@ def organize_files():
     
     watch_dir = session.get('watch_dir', DEFAULT_WATCH_DIR)
     results = organize_all_files(watch_dir)
+    invalidate_directory_structure(watch_dir)
     
     return render_template('result.html', results=results, action='Organized')
 
@@ -274,7 +532,7 @@ def set_directory():
 @app.route('/change_password', methods=['GET', 'POST'])
 def change_password():
     """Change the password"""
-    global DEFAULT_PASSWORD
+    global DEFAULT_PASSWORD, DEFAULT_PASSWORD_HASH
     
     if 'authenticated' not in session:
         return redirect(url_for('login'))
@@ -287,7 +545,7 @@ def change_password():
         new_password = request.form.get('new_password', '')
         confirm_password = request.form.get('confirm_password', '')
         
-        if hash_password(current_password) != hash_password(DEFAULT_PASSWORD):
+        if not hmac.compare_digest(hashlib.sha256(current_password.encode()).digest(), DEFAULT_PASSWORD_HASH):
             error = 'Current password is incorrect!'
         elif new_password != confirm_password:
             error = 'New passwords do not match!'
@@ -296,6 +554,7 @@ def change_password():
         else:
             # In a real app, you'd save this to a config file
             DEFAULT_PASSWORD = new_password
+            DEFAULT_PASSWORD_HASH = hashlib.sha256(new_password.encode()).digest()
             success = 'Password changed successfully!'
     
     return render_template('change_password.html', error=error, success=success)
@@ -321,9 +580,10 @@ def protect_file():
         destination = os.path.join(protected_path, unique_filename)
         
         try:
-            shutil.move(filepath, destination)
+            move_file(filepath, destination)
         except Exception as e:
             print(f"Error protecting file: {e}")
+        invalidate_directory_structure(watch_dir)
     
     return redirect(url_for('dashboard'))
 
@@ -347,9 +607,10 @@ def unprotect_file():
             destination = os.path.join(watch_dir, filename)
         
         try:
-            shutil.move(filepath, destination)
+            move_file(filepath, destination)
         except Exception as e:
             print(f"Error unprotecting file: {e}")
+        invalidate_directory_structure(watch_dir)
     
     return redirect(url_for('dashboard'))
 
@@ -365,60 +626,33 @@ def get_protected_files():
     
     files = []
     if os.path.exists(protected_path):
-        for f in os.listdir(protected_path):
-            filepath = os.path.join(protected_path, f)
-            if os.path.isfile(filepath):
-                files.append({
-                    'name': f,
-                    'size': os.path.getsize(filepath),
-                    'path': filepath
-                })
+        files = _scan_files(protected_path)
     
     return {'files': files}
 
 
 # ============================================================
-# STATIC FILES
+# DOWNLOADS
 # ============================================================
 
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    return send_from_directory('static', filename)
-
-
 @app.route('/download/zip')
 def download_zip():
     """Download the project as ZIP file"""
     try:
-        # Create a ZIP file in memory
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Get the project root directory
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            
-            # Add all files from Code and Documents directories
-            for root, dirs, files in os.walk(project_root):
-                # Skip certain directories
-                dirs[:] = [d for d in dirs if d not in ['__pycache__', '.git', '.vscode', 'protected_files', '.pytest_cache', 'instance']]
-                
-                for file in files:
-                    # Skip certain files
-                    if file.endswith(('.pyc', '.pyo', '.db', '.log', '.exe')):
-                        continue
-                    
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, os.path.dirname(project_root))
-                    zip_file.write(file_path, arcname)
+        # Get the project root directory
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        files = iter_project_files(project_root, os.path.dirname(project_root))
         
-        zip_buffer.seek(0)
+        # Produce the first chunk before sending headers so setup errors still
+        # redirect below; errors later in the stream can only truncate the archive
+        stream = generate_zip(files)
+        first_chunk = next(stream)
         
-        # Send the ZIP file
-        return send_file(
-            zip_buffer,
+        # Stream the ZIP file as each entry is compressed
+        return Response(
+            itertools.chain((first_chunk,), stream),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name='secure-file-organizer.zip'
+            headers={'Content-Disposition': 'attachment; filename=secure-file-organizer.zip'}
         )
     
     except Exception as e:
@@ -8,20 +8,21 @@ Supports both one-time organization and continuous watch mode.
 import os
 import shutil
 import argparse
+import heapq
+import importlib.util
+import threading
 import time
-from pathlib import Path
 from typing import Dict, List
 
-# Try to import watchdog, install if not available
-try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-    WATCHDOG_AVAILABLE = True
-except ImportError:
-    WATCHDOG_AVAILABLE = False
+# Check for watchdog without importing it; it is only loaded in watch mode
+WATCHDOG_AVAILABLE = importlib.util.find_spec('watchdog') is not None
+if not WATCHDOG_AVAILABLE:
     print("watchdog library not found. Install it with: pip install watchdog")
     print("Watch mode will not be available.")
 
+# inotify lets the simple watch loop block on kernel events instead of polling (Linux only)
+INOTIFY_AVAILABLE = importlib.util.find_spec('inotify_simple') is not None
+
 
 # ============================================================
 # CONFIGURATION: File Extension Mapping
@@ -42,6 +43,11 @@ for category, extensions in FILE_EXTENSION_MAP.items():
     for ext in extensions:
         EXTENSION_TO_CATEGORY[ext.lower()] = category
 
+# Lowercase and uppercase spellings resolve without calling str.lower()
+_EXT_CATEGORY = dict(EXTENSION_TO_CATEGORY)
+_EXT_CATEGORY.update({ext.upper(): category for ext, category in EXTENSION_TO_CATEGORY.items()})
+_EXT_CATEGORY_GET = _EXT_CATEGORY.get
+
 
 # ============================================================
 # UTILITY FUNCTIONS
@@ -57,8 +63,14 @@ def get_category_for_file(filename: str) -> str:
     Returns:
         The category name or 'Others' if not found
     """
-    ext = Path(filename).suffix.lower()
-    return EXTENSION_TO_CATEGORY.get(ext, 'Others')
+    idx = filename.rfind('.')
+    if idx <= 0:
+        return 'Others'
+    ext = filename[idx:]
+    category = _EXT_CATEGORY_GET(ext)
+    if category is None:
+        category = _EXT_CATEGORY_GET(ext.lower(), 'Others')
+    return category
 
 
 def generate_unique_filename(destination_dir: str, filename: str) -> str:
@@ -73,21 +85,19 @@ def generate_unique_filename(destination_dir: str, filename: str) -> str:
     Returns:
         A unique filename that doesn't conflict with existing files
     """
-    file_path = Path(destination_dir) / filename
+    file_path = os.path.join(destination_dir, filename)
     
-    if not file_path.exists():
+    if not os.path.exists(file_path):
         return filename
     
     # Split filename into name and extension
-    path_obj = Path(filename)
-    name = path_obj.stem
-    extension = path_obj.suffix
+    name, extension = os.path.splitext(filename)
     
     counter = 1
     while True:
         new_filename = f"{name}({counter}){extension}"
-        new_path = Path(destination_dir) / new_filename
-        if not new_path.exists():
+        new_path = os.path.join(destination_dir, new_filename)
+        if not os.path.exists(new_path):
             return new_filename
         counter += 1
 
@@ -204,37 +214,88 @@ def organize_directory(watch_directory: str, dry_run: bool = False) -> int:
 # WATCH MODE (using watchdog)
 # ============================================================
 
-class FileOrganizerHandler(FileSystemEventHandler):
-    """Handler for file system events in watch mode."""
+class FileOrganizerHandler:
+    """
+    Handler for file system events in watch mode.
+    
+    Implements the dispatch() interface watchdog observers call, so the
+    watchdog package is only imported once watch mode actually starts.
+    """
     
-    def __init__(self, watch_directory: str):
+    def __init__(self, watch_directory: str, settle_delay: float = 0.5):
         self.watch_directory = watch_directory
+        self.settle_delay = settle_delay
         self.processed_files = set()
-        super().__init__()
+        
+        # New files wait in a deadline heap until they have settled
+        self.pending = []
+        self.in_flight = set()
+        self.condition = threading.Condition()
+        self.running = True
+        self.worker = threading.Thread(target=self._process_pending, daemon=True)
+        self.worker.start()
+    
+    def dispatch(self, event):
+        """Route a watchdog event to the matching handler method."""
+        if event.event_type == 'created':
+            self.on_created(event)
+        elif event.event_type == 'modified':
+            self.on_modified(event)
     
     def on_created(self, event):
         """Handle file creation events."""
         if event.is_directory:
             return
         
-        # Wait a bit for file to be fully written
-        time.sleep(0.5)
-        
         filepath = event.src_path
         
-        # Skip if already processed
-        if filepath in self.processed_files:
-            return
-        
-        print(f"\n🆕 New file detected: {os.path.basename(filepath)}")
-        organize_file(filepath, self.watch_directory)
-        self.processed_files.add(filepath)
+        with self.condition:
+            # Skip if already processed or waiting to be processed
+            if filepath in self.processed_files or filepath in self.in_flight:
+                return
+            
+            # Give the file a moment to be fully written
+            self.in_flight.add(filepath)
+            heapq.heappush(self.pending, (time.monotonic() + self.settle_delay, filepath))
+            self.condition.notify()
     
     def on_modified(self, event):
         """Handle file modification events."""
         # Sometimes files are modified after being created
         # We can ignore this to avoid duplicate processing
         pass
+    
+    def _process_pending(self):
+        """Worker loop: organize queued files once their settle delay has passed."""
+        while True:
+            with self.condition:
+                while self.running:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    timeout = self.pending[0][0] - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                
+                if not self.running:
+                    return
+                
+                _, filepath = heapq.heappop(self.pending)
+            
+            print(f"\n🆕 New file detected: {os.path.basename(filepath)}")
+            organize_file(filepath, self.watch_directory)
+            
+            with self.condition:
+                self.in_flight.discard(filepath)
+                self.processed_files.add(filepath)
+    
+    def stop(self):
+        """Stop the worker thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.worker.join()
 
 
 def watch_directory(watch_directory: str):
@@ -261,6 +322,8 @@ def watch_directory(watch_directory: str):
     organize_directory(watch_directory)
     
     # Then start watching for new files
+    from watchdog.observers import Observer
+    
     event_handler = FileOrganizerHandler(watch_directory)
     observer = Observer()
     observer.schedule(event_handler, watch_directory, recursive=False)
@@ -274,55 +337,102 @@ def watch_directory(watch_directory: str):
         observer.stop()
     
     observer.join()
+    event_handler.stop()
     print("✅ Watch mode stopped.")
 
 
 def watch_directory_loop(watch_directory: str, interval: int = 5):
     """
     Alternative watch implementation using a simple loop (no watchdog needed).
+    Uses inotify events when available, otherwise polls the directory.
     
     Args:
         watch_directory: The directory to watch
-        interval: Time in seconds between checks
+        interval: Time in seconds between checks when polling
     """
     print(f"\n👀 Starting simple watch mode on: {watch_directory}")
-    print(f"   Checking every {interval} seconds...")
+    if INOTIFY_AVAILABLE:
+        print("   Waiting for inotify events...")
+    else:
+        print(f"   Checking every {interval} seconds...")
     print("Press Ctrl+C to stop...")
     print("=" * 50)
     
+    # Register the inotify watch before seeding, so a file that lands during
+    # the seed pass still produces an event
+    inotify = None
+    if INOTIFY_AVAILABLE:
+        from inotify_simple import INotify, flags
+        
+        inotify = INotify()
+        inotify.add_watch(watch_directory, flags.CLOSE_WRITE | flags.MOVED_TO)
+    
     # Track files we've already processed
     processed_files = set()
     
     # First, organize existing files and mark them as processed
     if os.path.exists(watch_directory):
-        for entry in os.listdir(watch_directory):
-            filepath = os.path.join(watch_directory, entry)
-            if os.path.isfile(filepath):
-                processed_files.add(os.path.abspath(filepath))
+        with os.scandir(watch_directory) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    processed_files.add(os.path.abspath(entry.path))
     
     print(f"📊 Found {len(processed_files)} existing files (marked as processed)")
     print("=" * 50)
     
     try:
-        while True:
-            if os.path.exists(watch_directory):
-                for entry in os.listdir(watch_directory):
-                    filepath = os.path.join(watch_directory, entry)
-                    filepath_abs = os.path.abspath(filepath)
-                    
-                    if os.path.isfile(filepath) and filepath_abs not in processed_files:
-                        print(f"\n🆕 New file detected: {entry}")
-                        if organize_file(filepath, watch_directory):
-                            processed_files.add(filepath_abs)
-            
-            time.sleep(interval)
+        if inotify is not None:
+            _watch_inotify(inotify, watch_directory, processed_files)
+        else:
+            _watch_polling(watch_directory, processed_files, interval)
     
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping watch mode...")
     
+    finally:
+        if inotify is not None:
+            inotify.close()
+    
     print("✅ Watch mode stopped.")
 
 
+def _organize_new_file(filepath: str, watch_directory: str, processed_files: set):
+    """Organize a newly seen file in the simple watch loop."""
+    filepath_abs = os.path.abspath(filepath)
+    if filepath_abs in processed_files:
+        return
+    
+    print(f"\n🆕 New file detected: {os.path.basename(filepath)}")
+    if organize_file(filepath, watch_directory):
+        processed_files.add(filepath_abs)
+
+
+def _watch_inotify(inotify, watch_directory: str, processed_files: set):
+    """Block on an already-registered inotify watch and organize files as they finish writing or are moved in."""
+    from inotify_simple import flags
+    
+    while True:
+        for event in inotify.read():
+            if event.mask & flags.ISDIR:
+                continue
+            filepath = os.path.join(watch_directory, event.name)
+            if os.path.isfile(filepath):
+                _organize_new_file(filepath, watch_directory, processed_files)
+
+
+def _watch_polling(watch_directory: str, processed_files: set, interval: int):
+    """Poll the directory every `interval` seconds for new files."""
+    while True:
+        if os.path.exists(watch_directory):
+            with os.scandir(watch_directory) as it:
+                entries = [entry.path for entry in it if entry.is_file(follow_symlinks=False)]
+            
+            for filepath in entries:
+                _organize_new_file(filepath, watch_directory, processed_files)
+        
+        time.sleep(interval)
+
+
 # ============================================================
 # MAIN FUNCTION
 # ============================================================